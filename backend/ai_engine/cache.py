@@ -0,0 +1,29 @@
+"""
+Analysis Cache — content-addressed disk cache for pipeline outputs
+Keys are sha256 digests of the uploaded CSV bytes or of the Strategist context.
+"""
+import hashlib
+import os
+import tempfile
+import diskcache
+
+CACHE_DIR = os.getenv("ASCENDLY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ascendly_cache"))
+
+# How long cached outputs stay valid (seconds)
+CACHE_TTL = int(os.getenv("ASCENDLY_CACHE_TTL", 24 * 60 * 60))
+
+cache = diskcache.Cache(CACHE_DIR)
+
+
+def file_digest(file_path: str) -> str:
+    """sha256 hex digest of a file's contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_digest(text: str) -> str:
+    """sha256 hex digest of a text string."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
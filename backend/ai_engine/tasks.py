@@ -1,61 +1,205 @@
 """
 CrewAI Task & Crew Definitions
-Runs agents one at a time with delays to respect free-tier rate limits.
+Analyst and Forecaster steps call their tools directly; only the Strategist needs an LLM.
+Agent runs are async and back off only when the provider rate-limits a call.
 """
-import json
-import sys
+import asyncio
+import re
 import time
 import uuid
+import orjson
 from crewai import Task, Crew, Process
-from ai_engine.agents import create_data_analyst, create_forecaster, create_strategist
+from ai_engine.agents import LLM_MODEL, create_data_analyst, create_forecaster, create_strategist
+from ai_engine.cache import cache, CACHE_TTL, file_digest, text_digest
+from ai_engine.tools.data_tools import csv_reader, growth_calculator
+from ai_engine.tools.sarimax_tool import forecast_revenue
 
-# Delay between agent runs (seconds) to avoid rate limits
+# Fallback delay (seconds) when a rate-limit response carries no Retry-After header
 AGENT_DELAY = 75
 
+# How many times a rate-limited crew is retried before giving up
+MAX_RATE_LIMIT_RETRIES = 2
 
-def _countdown(seconds: int, label: str):
-    """Display a countdown timer in the terminal."""
-    for remaining in range(seconds, 0, -1):
-        mins, secs = divmod(remaining, 60)
-        sys.stdout.write(f"\r[Ascendly] {label} — resuming in {mins:02d}:{secs:02d} ")
-        sys.stdout.flush()
-        time.sleep(1)
-    sys.stdout.write(f"\r[Ascendly] {label} — done! Continuing...           \n")
-    sys.stdout.flush()
+# Part of the advice cache key — bump when the Strategist prompt or agent changes
+STRATEGIST_PROMPT_VERSION = 1
 
+# Greedy matches for a JSON array / object embedded in free-form LLM text
+_JSON_ARRAY_RE = re.compile(r'\[[\s\S]*\]')
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
 
-def _run_crew_safe(crew, task, label: str) -> str:
-    """Run a crew and return the task output. If the crew fails, try to salvage tool output."""
+
+def result_cache_key(file_hash: str, use_llm: bool = False) -> tuple:
+    """Key for a whole cached response: includes everything the stage and advice keys do."""
+    return ("result", file_hash, use_llm, STRATEGIST_PROMPT_VERSION, LLM_MODEL)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Check whether an exception is a provider rate-limit (HTTP 429) error."""
+    response = getattr(error, "response", None)
+    if 429 in (getattr(error, "status_code", None), getattr(response, "status_code", None)):
+        return True
+    message = str(error).lower()
+    return "rate limit" in message or "rate_limit" in message
+
+
+def _retry_after(error: Exception) -> float:
+    """Read the Retry-After header from a rate-limit error, falling back to AGENT_DELAY."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
     try:
-        crew.kickoff()
-        return str(task.output)
-    except Exception as e:
-        print(f"[Ascendly] {label} crew failed: {e}")
-        # Try to salvage output — the tool may have run successfully before the LLM failed
-        if task.output:
-            print(f"[Ascendly] {label} — salvaged partial output from task.")
-            return str(task.output)
-        # Check if any tool calls produced output (stored in task tools_output or similar)
-        error_msg = str(e)
-        if "forecast" in error_msg.lower() or "cleaned_data" in error_msg.lower():
-            return error_msg
-        print(f"[Ascendly] {label} — no output to salvage. Continuing with empty result.")
-        return ""
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return float(AGENT_DELAY)
+
 
+def _log_token_usage(crew_output, label: str):
+    """Log prompt tokens and how many of them the provider served from its prefix cache."""
+    usage = getattr(crew_output, "token_usage", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0)
+    cached_tokens = getattr(usage, "cached_prompt_tokens", 0)
+    print(f"[Ascendly] {label} — prompt tokens: {prompt_tokens} ({cached_tokens} cached)")
 
-def run_analysis(file_path: str) -> dict:
+
+async def _run_crew_safe(crew, task, label: str) -> str:
+    """Run a crew and return the task output. Retries on rate limits; on failure, tries to salvage tool output."""
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        try:
+            crew_output = await crew.kickoff_async()
+            _log_token_usage(crew_output, label)
+            return str(task.output)
+        except Exception as e:
+            if _is_rate_limited(e) and attempt < MAX_RATE_LIMIT_RETRIES:
+                delay = _retry_after(e)
+                print(f"[Ascendly] {label} rate-limited — retrying in {delay:.0f}s...")
+                await asyncio.sleep(delay)
+                continue
+            print(f"[Ascendly] {label} crew failed: {e}")
+            # Try to salvage output — the tool may have run successfully before the LLM failed
+            if task.output:
+                print(f"[Ascendly] {label} — salvaged partial output from task.")
+                return str(task.output)
+            # Check if any tool calls produced output (stored in task tools_output or similar)
+            error_msg = str(e)
+            if "forecast" in error_msg.lower() or "cleaned_data" in error_msg.lower():
+                return error_msg
+            print(f"[Ascendly] {label} — no output to salvage. Continuing with empty result.")
+            return ""
+
+
+async def run_analysis(file_path: str, file_hash: str | None = None, use_llm: bool = False) -> dict:
     """
     Run the full AI analysis pipeline on a CSV file.
-    Runs each agent separately with delays to stay within free-tier rate limits.
+    Steps 1-2 run the data tools directly unless use_llm=True (debug mode: full agents).
+    Analyst+Forecaster outputs are cached by file content, Strategist advice by its context.
     """
     start_time = time.time()
     request_id = str(uuid.uuid4())
 
+    if file_hash is None:
+        file_hash = await asyncio.to_thread(file_digest, file_path)
+
+    # === Steps 1-2: Analyst + Forecaster (cached per CSV content) ===
+    # Debug runs (use_llm) produce agent output, so they never share entries with tool runs
+    stages_key = ("stages", file_hash, use_llm)
+    cached_stages = await asyncio.to_thread(cache.get, stages_key)
+    if cached_stages:
+        print("[Ascendly] Cache hit — skipping Steps 1-2.")
+        analyst_output, forecast_output = cached_stages
+        strategist = None
+    else:
+        if use_llm:
+            data_stages = _run_data_agents(file_path)
+        else:
+            data_stages = asyncio.to_thread(_run_data_tools, file_path)
+
+        # Build the Strategist while the data stages run — it needs no pipeline context
+        (analyst_output, forecast_output), strategist = await asyncio.gather(
+            data_stages,
+            asyncio.to_thread(create_strategist),
+        )
+        if analyst_output and forecast_output:
+            await asyncio.to_thread(cache.set, stages_key, (analyst_output, forecast_output), expire=CACHE_TTL)
+
+    # === Step 3: Strategist (cached per context) ===
+    print("[Ascendly] Starting Step 3/3: Strategist...")
+
+    # Truncate context to save tokens
+    context_summary = f"Analyst: {analyst_output[:1000]}\nForecast: {forecast_output[:1000]}"
+
+    advice_key = ("advice", STRATEGIST_PROMPT_VERSION, LLM_MODEL, text_digest(context_summary))
+    strategist_output = await asyncio.to_thread(cache.get, advice_key)
+    if strategist_output:
+        print("[Ascendly] Cache hit — skipping Strategist.")
+    else:
+        strategist = strategist or create_strategist()
+        task_advise = Task(
+            # Static instructions first, data last — keeps the prompt prefix cacheable
+            description=(
+                "Based on the data below, give exactly 3 recommendations as a JSON array. "
+                "Each with 'title' and 'body' keys. Be direct, no fluff.\n\n"
+                f"---DATA---\n{context_summary}"
+            ),
+            expected_output='JSON array: [{"title": "...", "body": "..."}]',
+            agent=strategist,
+        )
+
+        crew3 = Crew(
+            agents=[strategist],
+            tasks=[task_advise],
+            process=Process.sequential,
+            verbose=True,
+            max_rpm=2,
+        )
+        strategist_output = await _run_crew_safe(crew3, task_advise, "Strategist")
+        if strategist_output:
+            await asyncio.to_thread(cache.set, advice_key, strategist_output, expire=CACHE_TTL)
+
+    processing_time = int((time.time() - start_time) * 1000)
+
+    # Parse outputs into API response
+    response = _parse_outputs(analyst_output, forecast_output, strategist_output, processing_time)
+    response["request_id"] = request_id
+
+    # Collect agent logs
+    response["agent_logs"] = [
+        {"agent_name": "Analyst", "output": analyst_output},
+        {"agent_name": "Forecaster", "output": forecast_output},
+        {"agent_name": "Strategist", "output": strategist_output},
+    ]
+
+    return response
+
+
+def _run_data_tools(file_path: str) -> tuple[str, str]:
+    """Run the Analyst and Forecaster steps as plain tool calls — no LLM involved."""
+    print("[Ascendly] Steps 1-2/3: running data tools directly...")
+    cleaned_data = csv_reader.run(file_path)
+    analysis = orjson.loads(growth_calculator.run(cleaned_data))
+
+    if "error" in analysis:
+        analyst_output = orjson.dumps(analysis).decode()
+    else:
+        # Metrics first so they survive the Strategist's context truncation
+        analyst_output = orjson.dumps({**analysis, "cleaned_data": orjson.loads(cleaned_data)}).decode()
+
+    forecast_output = forecast_revenue.run(cleaned_data)
+    print("[Ascendly] Steps 1-2 complete.")
+
+    return analyst_output, forecast_output
+
+
+async def _run_data_agents(file_path: str) -> tuple[str, str]:
+    """Debug mode: run the Analyst and Forecaster as LLM agents, returning their raw outputs."""
     # === Step 1: Data Analyst ===
     print("[Ascendly] Starting Step 1/3: Data Analyst...")
     analyst = create_data_analyst()
     task_analyze = Task(
-        description=f"Read CSV at '{file_path}' with csv_reader. Then run growth_calculator on the result. Return the cleaned data and metrics.",
+        description=(
+            "Read the CSV with csv_reader. Then run growth_calculator on the result. "
+            f"Return the cleaned data and metrics.\n\nCSV path: '{file_path}'"
+        ),
         expected_output="JSON with 'cleaned_data' array and 'metrics' object.",
         agent=analyst,
     )
@@ -67,31 +211,29 @@ def run_analysis(file_path: str) -> dict:
         verbose=True,
         max_rpm=2,
     )
-    analyst_output = _run_crew_safe(crew1, task_analyze, "Analyst")
+    analyst_output = await _run_crew_safe(crew1, task_analyze, "Analyst")
 
     # If analyst failed completely, try running csv_reader + growth_calculator directly
     if not analyst_output:
         print("[Ascendly] Analyst agent failed. Running tools directly as fallback...")
-        from ai_engine.tools.data_tools import csv_reader, growth_calculator
         try:
-            csv_result = csv_reader.run(file_path)
-            growth_result = growth_calculator.run(csv_result)
+            csv_result = await asyncio.to_thread(csv_reader.run, file_path)
+            growth_result = await asyncio.to_thread(growth_calculator.run, csv_result)
             analyst_output = growth_result
             print("[Ascendly] Direct tool fallback succeeded.")
         except Exception as fallback_err:
             print(f"[Ascendly] Direct tool fallback also failed: {fallback_err}")
             analyst_output = csv_result if csv_result else ""
 
-    # Wait for rate limit to reset
     print(f"[Ascendly] Step 1 complete.")
-    _countdown(AGENT_DELAY, "Rate limit cooldown (1/2)")
 
     # === Step 2: Forecaster ===
     print("[Ascendly] Starting Step 2/3: Forecaster...")
     forecaster = create_forecaster()
     task_forecast = Task(
         description=(
-            f"Run forecast_revenue tool with this data: {analyst_output[:2000]}"
+            "Run forecast_revenue tool with the data below.\n\n"
+            f"Data: {analyst_output[:2000]}"
         ),
         expected_output="JSON with model_used, data_points, and forecast array.",
         agent=forecaster,
@@ -104,70 +246,29 @@ def run_analysis(file_path: str) -> dict:
         verbose=True,
         max_rpm=2,
     )
-    forecast_output = _run_crew_safe(crew2, task_forecast, "Forecaster")
+    forecast_output = await _run_crew_safe(crew2, task_forecast, "Forecaster")
 
     # If forecaster failed, try running the tool directly
     if not forecast_output:
         print("[Ascendly] Forecaster agent failed. Running SARIMAX tool directly as fallback...")
-        from ai_engine.tools.sarimax_tool import forecast_revenue
         try:
             # Extract just the cleaned data array from analyst output
             analyst_data = _extract_json(analyst_output)
             if isinstance(analyst_data, dict) and "cleaned_data" in analyst_data:
-                tool_input = json.dumps(analyst_data["cleaned_data"])
+                tool_input = orjson.dumps(analyst_data["cleaned_data"]).decode()
             elif isinstance(analyst_data, dict) and "metrics" in analyst_data:
                 # growth_calculator output — need the raw data, not metrics
                 tool_input = analyst_output
             else:
                 tool_input = analyst_output
-            forecast_output = forecast_revenue.run(tool_input)
+            forecast_output = await asyncio.to_thread(forecast_revenue.run, tool_input)
             print("[Ascendly] Direct SARIMAX fallback succeeded.")
         except Exception as fallback_err:
             print(f"[Ascendly] Direct SARIMAX fallback also failed: {fallback_err}")
 
-    # Wait for rate limit to reset
     print(f"[Ascendly] Step 2 complete.")
-    _countdown(AGENT_DELAY, "Rate limit cooldown (2/2)")
-
-    # === Step 3: Strategist ===
-    print("[Ascendly] Starting Step 3/3: Strategist...")
-    strategist = create_strategist()
-
-    # Truncate context to save tokens
-    context_summary = f"Analyst: {analyst_output[:1000]}\nForecast: {forecast_output[:1000]}"
-
-    task_advise = Task(
-        description=(
-            f"Based on this data, give exactly 3 recommendations as JSON array. "
-            f"Each with 'title' and 'body' keys. Be direct.\n\n{context_summary}"
-        ),
-        expected_output='JSON array: [{"title": "...", "body": "..."}]',
-        agent=strategist,
-    )
-
-    crew3 = Crew(
-        agents=[strategist],
-        tasks=[task_advise],
-        process=Process.sequential,
-        verbose=True,
-        max_rpm=2,
-    )
-    strategist_output = _run_crew_safe(crew3, task_advise, "Strategist")
 
-    processing_time = int((time.time() - start_time) * 1000)
-
-    # Parse outputs into API response
-    response = _parse_outputs(analyst_output, forecast_output, strategist_output, processing_time)
-    response["request_id"] = request_id
-
-    # Collect agent logs
-    response["agent_logs"] = [
-        {"agent_name": "Analyst", "output": analyst_output},
-        {"agent_name": "Forecaster", "output": forecast_output},
-        {"agent_name": "Strategist", "output": strategist_output},
-    ]
-
-    return response
+    return analyst_output, forecast_output
 
 
 def _parse_outputs(analyst_output: str, forecast_output: str, advice_output: str, processing_time: int) -> dict:
@@ -221,19 +322,17 @@ def _parse_outputs(analyst_output: str, forecast_output: str, advice_output: str
 
 def _extract_json(text: str):
     """Try to extract JSON from text that may contain extra content."""
-    import re
-
     try:
-        return json.loads(text)
-    except (json.JSONDecodeError, TypeError):
+        return orjson.loads(text)
+    except (orjson.JSONDecodeError, TypeError):
         pass
 
-    for pattern in [r'\[[\s\S]*\]', r'\{[\s\S]*\}']:
-        match = re.search(pattern, text)
+    for pattern in (_JSON_ARRAY_RE, _JSON_OBJECT_RE):
+        match = pattern.search(text)
         if match:
             try:
-                return json.loads(match.group())
-            except json.JSONDecodeError:
+                return orjson.loads(match.group())
+            except orjson.JSONDecodeError:
                 continue
 
     return None
@@ -2,20 +2,68 @@
 Data Analysis Tools for CrewAI
 CSV reading, cleaning, and growth calculation.
 """
-import json
-from difflib import SequenceMatcher
+import re
+from datetime import datetime
+import orjson
 import pandas as pd
 import numpy as np
+from rapidfuzz import fuzz
 from crewai.tools import tool
 
 
+# Common date formats in financial exports, checked against a sample value
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%Y/%m/%d", "%Y-%m", "%b %Y", "%B %Y")
+
+# Splits column names into words ("Revenue Growth %" -> revenue, growth)
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse a column of dates with one detected format instead of per-value inference.
+    The format is picked from the first non-null value; falls back to format="mixed"
+    if no known format parses every row.
+    """
+    non_null = values.dropna()
+    if not non_null.empty:
+        sample = str(non_null.iloc[0]).strip()
+        for fmt in _DATE_FORMATS:
+            try:
+                datetime.strptime(sample, fmt)
+            except ValueError:
+                continue
+            parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+            if parsed.isna().sum() == values.isna().sum():
+                return parsed
+    return pd.to_datetime(values, format="mixed")
+
+
+def _column_score(col: str, target: str) -> tuple[float, float]:
+    """
+    Score how well a column name matches a target: exact > word match > contained > fuzzy.
+    Containment only counts whole words, so "last updated" doesn't match "date".
+    The second element (plain fuzzy ratio) breaks ties between columns in the same tier.
+    """
+    ratio = fuzz.ratio(col, target) / 100
+    if col == target:
+        return 1.0, ratio
+    if target in _NON_ALNUM_RE.split(col):
+        return 0.9, ratio
+    if col and col in target:
+        return 0.8, ratio
+    return ratio, ratio
+
+
 def _fuzzy_match_column(columns: list[str], target: str, threshold: float = 0.6) -> str | None:
     """Find the best fuzzy match for a column name."""
+    target = target.lower()
     best_match = None
-    best_score = 0
+    best_score = (0, 0)
     for col in columns:
-        score = SequenceMatcher(None, col.lower().strip(), target.lower()).ratio()
-        if score > best_score and score >= threshold:
+        score = _column_score(col.lower().strip(), target)
+        if score[0] == 1.0:
+            return col
+        if score > best_score and score[0] >= threshold:
             best_score = score
             best_match = col
     return best_match
@@ -29,10 +77,10 @@ def csv_reader(file_path: str) -> str:
     Input: Path to the CSV file.
     Output: JSON string of cleaned data with 'date' and 'revenue' keys.
     """
-    df = pd.read_csv(file_path)
+    # Sniff the header first so the full parse only touches the columns we need
+    columns = pd.read_csv(file_path, nrows=0).columns.tolist()
 
     # Fuzzy match Date and Revenue columns
-    columns = df.columns.tolist()
     date_col = _fuzzy_match_column(columns, "date")
     revenue_col = _fuzzy_match_column(columns, "revenue")
 
@@ -44,20 +92,23 @@ def csv_reader(file_path: str) -> str:
                 break
 
     if not date_col or not revenue_col:
-        return json.dumps({
+        return orjson.dumps({
             "error": f"Could not find required columns. Found: {columns}. "
                      f"Need columns matching 'Date' and 'Revenue'."
-        })
-
-    # Extract and clean
-    result = pd.DataFrame()
-    result["date"] = pd.to_datetime(df[date_col], format="mixed")
-    result["revenue"] = pd.to_numeric(df[revenue_col], errors="coerce")
+        }).decode()
 
     # Check for expenses column (optional)
     expense_col = _fuzzy_match_column(columns, "expenses")
     if not expense_col:
         expense_col = _fuzzy_match_column(columns, "expense")
+
+    usecols = list(dict.fromkeys(c for c in (date_col, revenue_col, expense_col) if c))
+    df = pd.read_csv(file_path, usecols=usecols, dtype={date_col: str})
+
+    # Extract and clean
+    result = pd.DataFrame()
+    result["date"] = parse_dates(df[date_col])
+    result["revenue"] = pd.to_numeric(df[revenue_col], errors="coerce")
     if expense_col:
         result["expenses"] = pd.to_numeric(df[expense_col], errors="coerce")
 
@@ -71,14 +122,21 @@ def csv_reader(file_path: str) -> str:
     result = result.dropna(subset=["date", "revenue"])
 
     if len(result) < 6:
-        return json.dumps({
+        return orjson.dumps({
             "error": f"Insufficient data. Need at least 6 rows, got {len(result)}."
-        })
-
-    # Format dates as strings for JSON
-    output = result.copy()
-    output["date"] = output["date"].dt.strftime("%Y-%m-%d")
-    return output.to_json(orient="records")
+        }).decode()
+
+    # Build JSON records straight from the columns — no full-frame copy
+    dates = result["date"].dt.strftime("%Y-%m-%d")
+    revenues = result["revenue"].tolist()
+    if "expenses" in result:
+        records = [
+            {"date": d, "revenue": r, "expenses": e}
+            for d, r, e in zip(dates, revenues, result["expenses"].tolist())
+        ]
+    else:
+        records = [{"date": d, "revenue": r} for d, r in zip(dates, revenues)]
+    return orjson.dumps(records).decode()
 
 
 @tool("growth_calculator")
@@ -88,16 +146,16 @@ def growth_calculator(cleaned_data_json: str) -> str:
     Input: JSON string of cleaned data with 'date' and 'revenue' keys.
     Output: Text summary with key metrics (average revenue, MoM growth, trends).
     """
-    data = json.loads(cleaned_data_json)
+    data = orjson.loads(cleaned_data_json)
 
     if isinstance(data, dict) and "error" in data:
-        return json.dumps(data)
+        return orjson.dumps(data).decode()
 
     df = pd.DataFrame(data)
     df["date"] = pd.to_datetime(df["date"])
     df = df.sort_values("date")
 
-    revenues = df["revenue"].values
+    revenues = df["revenue"].to_numpy(dtype=float)
     dates = df["date"].values
 
     # Basic stats
@@ -107,15 +165,16 @@ def growth_calculator(cleaned_data_json: str) -> str:
     max_revenue = float(np.max(revenues))
     total_months = len(revenues)
 
-    # Month-over-Month growth rates
-    mom_growth = []
-    for i in range(1, len(revenues)):
-        if revenues[i - 1] != 0:
-            growth = ((revenues[i] - revenues[i - 1]) / revenues[i - 1]) * 100
-            mom_growth.append(round(growth, 2))
+    # Month-over-Month growth rates (undefined after a zero-revenue month)
+    prev = revenues[:-1]
+    curr = revenues[1:]
+    mask = prev != 0
+    growth = np.where(mask, (curr - prev) / np.where(mask, prev, 1) * 100, np.nan)
+    has_growth = bool(np.any(~np.isnan(growth)))
 
-    avg_growth = round(float(np.mean(mom_growth)), 2) if mom_growth else 0
-    growth_volatility = round(float(np.std(mom_growth)), 2) if mom_growth else 0
+    avg_growth = round(float(np.nanmean(growth)), 2) if has_growth else 0
+    growth_volatility = round(float(np.nanstd(growth)), 2) if has_growth else 0
+    mom_growth = np.round(growth[~np.isnan(growth)], 2).tolist()
 
     # Trend direction
     if len(revenues) >= 3:
@@ -156,4 +215,4 @@ def growth_calculator(cleaned_data_json: str) -> str:
         f"Recent trend is {trend}."
     )
 
-    return json.dumps({"summary_text": text, "metrics": summary}, indent=2)
+    return orjson.dumps({"summary_text": text, "metrics": summary}).decode()
@@ -1,13 +1,45 @@
 """
 SARIMAX Forecasting Tool for CrewAI
-Predicts future revenue using SARIMAX or SES fallback.
+Predicts future revenue using SARIMAX (ARIMA when there's no seasonality) or SES fallback.
 """
-import json
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
+import re
+import threading
+import warnings
+from collections import OrderedDict
+import orjson
 import pandas as pd
 import numpy as np
+from numba import njit
+from scipy.signal import periodogram
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from statsmodels.tsa.holtwinters import SimpleExpSmoothing
 from crewai.tools import tool
+from ai_engine.tools.data_tools import parse_dates
+
+# Fallback patterns for JSON wrapped in extra text by the calling agent
+_JSON_ARRAY_RE = re.compile(r'\[[\s\S]*\]')
+_JSON_OBJECT_RE = re.compile(r'\{[\s\S]*\}')
+
+# Fitted SARIMAX params, keyed by (order, seasonal_order, series bytes). Bounded LRU.
+PARAMS_CACHE_SIZE = 32
+_params_cache: OrderedDict = OrderedDict()
+_params_lock = threading.Lock()
+
+
+@njit(cache=True)
+def _apply_guardrails_nb(forecast_values: np.ndarray, last_actual: float) -> np.ndarray:
+    """Numba kernel for _apply_guardrails — float64 arrays and scalars only."""
+    guarded = np.empty_like(forecast_values)
+    prev = last_actual
+    for i in range(forecast_values.shape[0]):
+        val = forecast_values[i]
+        if val < 0.0:
+            val = 0.0
+        if prev > 0.0 and val > prev * 5.0:
+            val = prev * 1.5
+        guarded[i] = val
+        prev = val
+    return guarded
 
 
 def _apply_guardrails(forecast_values: list[float], last_actual: float) -> list[float]:
@@ -16,32 +48,78 @@ def _apply_guardrails(forecast_values: list[float], last_actual: float) -> list[
     - Clamp negative revenue to 0
     - Cap growth at 150% if > 500% of previous month
     """
-    guarded = []
-    prev = last_actual
-    for val in forecast_values:
-        if val < 0:
-            val = 0.0
-        if prev > 0 and val > prev * 5.0:
-            val = prev * 1.5
-        guarded.append(round(val, 2))
-        prev = val
-    return guarded
+    values = np.asarray(forecast_values, dtype=np.float64)
+    return np.round(_apply_guardrails_nb(values, float(last_actual)), 2).tolist()
+
 
+def _has_seasonality(series: pd.Series, period: int = 12) -> bool:
+    """Cheap periodogram test for a yearly cycle. Needs at least two full cycles of data."""
+    if len(series) < 2 * period:
+        return False
+    freqs, power = periodogram(series.to_numpy(), detrend="linear")
+    return bool(power[np.abs(freqs - 1 / period).argmin()] > 2 * power.mean())
 
-def _forecast_sarimax(series: pd.Series, steps: int = 3):
-    """Run SARIMAX model on the time series."""
-    from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+def _lookup_params(spec: tuple, values: bytes) -> tuple[np.ndarray | None, bool]:
+    """
+    Find cached params for a series. Returns (params, exact): exact=True if this very
+    series was fitted before, exact=False if a cached series is a prefix of it
+    (e.g. the same history plus new months), or (None, False) on a miss.
+    """
+    with _params_lock:
+        key = (spec, values)
+        if key in _params_cache:
+            _params_cache.move_to_end(key)
+            return _params_cache[key], True
+        for (cached_spec, cached_values), params in reversed(_params_cache.items()):
+            if cached_spec == spec and values.startswith(cached_values):
+                return params, False
+    return None, False
+
+
+def _store_params(spec: tuple, values: bytes, params: np.ndarray):
+    """Cache fitted params, evicting the least recently used entry when full."""
+    with _params_lock:
+        _params_cache[(spec, values)] = params
+        _params_cache.move_to_end((spec, values))
+        while len(_params_cache) > PARAMS_CACHE_SIZE:
+            _params_cache.popitem(last=False)
+
+
+def _forecast_sarimax(
+    series: pd.Series,
+    steps: int = 3,
+    order: tuple = (1, 1, 1),
+    seasonal_order: tuple = (1, 1, 1, 12),
+):
+    """Run SARIMAX model on the time series. seasonal_order=(0, 0, 0, 0) gives plain ARIMA."""
     model = SARIMAX(
         series,
-        order=(1, 1, 1),
-        seasonal_order=(1, 1, 1, 12),
+        order=order,
+        seasonal_order=seasonal_order,
         enforce_stationarity=False,
         enforce_invertibility=False,
     )
-    results = model.fit(disp=False)
+    spec = (tuple(order), tuple(seasonal_order))
+    values = series.to_numpy(dtype=np.float64).tobytes()
+    cached_params, exact = _lookup_params(spec, values)
+
+    # Only out-of-sample forecasts are used: skip the parameter covariance. Keep full filter
+    # output (no low_memory) — forecast confidence intervals need the stored state covariances.
+    if exact:
+        # Same series fitted before — just run the filter with the known params
+        results = model.filter(cached_params, cov_type="none")
+    else:
+        # Warm-start from a fit of a prefix of this series when we have one
+        results = model.fit(
+            start_params=cached_params,
+            disp=False,
+            method="lbfgs",
+            cov_type="none",
+        )
+        _store_params(spec, values, np.asarray(results.params))
     forecast = results.get_forecast(steps=steps)
-    summary = forecast.summary_frame(alpha=0.20)  # 80% confidence interval
+    summary = forecast.summary_frame(alpha=0.20)[["mean", "mean_ci_lower", "mean_ci_upper"]]  # 80% CI
 
     return {
         "mean": summary["mean"].tolist(),
@@ -52,8 +130,6 @@ def _forecast_sarimax(series: pd.Series, steps: int = 3):
 
 def _forecast_ses(series: pd.Series, steps: int = 3):
     """Fallback: Simple Exponential Smoothing for < 12 data points."""
-    from statsmodels.tsa.holtwinters import SimpleExpSmoothing
-
     model = SimpleExpSmoothing(series).fit()
     forecast = model.forecast(steps)
 
@@ -65,6 +141,18 @@ def _forecast_ses(series: pd.Series, steps: int = 3):
     }
 
 
+def warmup():
+    """Fit a dummy SARIMAX and compile the guardrail kernel so the first real request doesn't pay for it."""
+    series = pd.Series(
+        np.arange(1.0, 25.0),
+        index=pd.date_range("2000-01-01", periods=24, freq="MS"),
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        _forecast_sarimax(series, steps=3)
+    _apply_guardrails([1.0, 2.0, 3.0], 1.0)
+
+
 @tool("forecast_revenue")
 def forecast_revenue(cleaned_data_json: str) -> str:
     """
@@ -74,21 +162,20 @@ def forecast_revenue(cleaned_data_json: str) -> str:
     Output: JSON string with forecast results including confidence intervals.
     """
     try:
-        data = json.loads(cleaned_data_json)
-    except (json.JSONDecodeError, TypeError):
+        data = orjson.loads(cleaned_data_json)
+    except (orjson.JSONDecodeError, TypeError):
         # Try to extract JSON from text that may contain extra content
-        import re
         json_match = None
-        for pattern in [r'\[[\s\S]*\]', r'\{[\s\S]*\}']:
-            match = re.search(pattern, str(cleaned_data_json))
+        for pattern in (_JSON_ARRAY_RE, _JSON_OBJECT_RE):
+            match = pattern.search(str(cleaned_data_json))
             if match:
                 try:
-                    json_match = json.loads(match.group())
+                    json_match = orjson.loads(match.group())
                     break
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     continue
         if json_match is None:
-            return json.dumps({"error": "Could not parse input as JSON. Please pass a JSON array of objects with 'date' and 'revenue' keys."})
+            return orjson.dumps({"error": "Could not parse input as JSON. Please pass a JSON array of objects with 'date' and 'revenue' keys."}).decode()
         data = json_match
 
     # Handle various input formats the LLM might send
@@ -109,15 +196,15 @@ def forecast_revenue(cleaned_data_json: str) -> str:
                     break
 
     if not isinstance(data, list) or len(data) == 0:
-        return json.dumps({"error": f"Expected a JSON array of objects with 'date' and 'revenue' keys. Got: {str(data)[:200]}"})
+        return orjson.dumps({"error": f"Expected a JSON array of objects with 'date' and 'revenue' keys. Got: {str(data)[:200]}"}).decode()
 
     if len(data) < 3:
-        return json.dumps({"error": f"Need at least 3 data points for forecasting, got {len(data)}."})
+        return orjson.dumps({"error": f"Need at least 3 data points for forecasting, got {len(data)}."}).decode()
 
     try:
         df = pd.DataFrame(data)
     except ValueError:
-        return json.dumps({"error": f"Could not create DataFrame from data. Expected list of dicts with 'date' and 'revenue'. Got: {str(data)[:200]}"})
+        return orjson.dumps({"error": f"Could not create DataFrame from data. Expected list of dicts with 'date' and 'revenue'. Got: {str(data)[:200]}"}).decode()
 
     # Flexible column name matching
     col_map = {}
@@ -129,20 +216,20 @@ def forecast_revenue(cleaned_data_json: str) -> str:
             col_map["revenue"] = col
 
     if "date" not in col_map or "revenue" not in col_map:
-        return json.dumps({"error": f"Could not find 'date' and 'revenue' columns. Found columns: {list(df.columns)}"})
+        return orjson.dumps({"error": f"Could not find 'date' and 'revenue' columns. Found columns: {list(df.columns)}"}).decode()
 
     df = df.rename(columns={col_map["date"]: "date", col_map["revenue"]: "revenue"})
 
     try:
-        df["date"] = pd.to_datetime(df["date"], format="mixed")
+        df["date"] = parse_dates(df["date"])
     except Exception:
-        return json.dumps({"error": f"Could not parse dates. Sample values: {df['date'].head(3).tolist()}"})
+        return orjson.dumps({"error": f"Could not parse dates. Sample values: {df['date'].head(3).tolist()}"}).decode()
 
     df["revenue"] = pd.to_numeric(df["revenue"], errors="coerce")
     df = df.dropna(subset=["date", "revenue"])
 
     if len(df) < 3:
-        return json.dumps({"error": f"After cleaning, only {len(df)} valid rows remain. Need at least 3."})
+        return orjson.dumps({"error": f"After cleaning, only {len(df)} valid rows remain. Need at least 3."}).decode()
 
     df = df.sort_values("date")
     df.set_index("date", inplace=True)
@@ -158,16 +245,20 @@ def forecast_revenue(cleaned_data_json: str) -> str:
     series = df["revenue"].astype(float)
 
     if len(series) < 3:
-        return json.dumps({"error": f"After resampling, only {len(series)} data points. Need at least 3."})
+        return orjson.dumps({"error": f"After resampling, only {len(series)} data points. Need at least 3."}).decode()
 
     # Choose model based on data points
     n_points = len(series)
     if n_points < 12:
         raw = _forecast_ses(series, steps=3)
         model_used = "SES"
-    else:
+    elif _has_seasonality(series):
         raw = _forecast_sarimax(series, steps=3)
         model_used = "SARIMAX"
+    else:
+        # No yearly cycle to fit — skip the seasonal state entirely
+        raw = _forecast_sarimax(series, steps=3, seasonal_order=(0, 0, 0, 0))
+        model_used = "ARIMA"
 
     last_actual = float(series.iloc[-1])
     last_date = series.index[-1]
@@ -178,19 +269,19 @@ def forecast_revenue(cleaned_data_json: str) -> str:
     guarded_upper = _apply_guardrails(raw["upper"], last_actual)
 
     # Build forecast result
-    forecast = []
-    for i in range(3):
-        forecast_date = last_date + relativedelta(months=i + 1)
-        forecast.append({
-            "date": forecast_date.strftime("%Y-%m-%d"),
-            "revenue": guarded_mean[i],
-            "conf_lower": guarded_lower[i],
-            "conf_upper": guarded_upper[i],
-        })
+    forecast_dates = pd.date_range(
+        start=last_date + pd.offsets.MonthBegin(1),
+        periods=len(guarded_mean),
+        freq="MS",
+    ).strftime("%Y-%m-%d")
+    forecast = [
+        {"date": d, "revenue": m, "conf_lower": lo, "conf_upper": up}
+        for d, m, lo, up in zip(forecast_dates, guarded_mean, guarded_lower, guarded_upper)
+    ]
 
     result = {
         "model_used": model_used,
         "data_points": n_points,
         "forecast": forecast,
     }
-    return json.dumps(result, indent=2)
+    return orjson.dumps(result).decode()
@@ -0,0 +1,122 @@
+"""
+Response Cache - Redis-backed cache for idempotent GET endpoints
+Cached bodies are keyed by request path + query and dropped when a write
+(POST/PUT/PATCH/DELETE) succeeds under the same top-level path. Each top-level
+path keeps a Redis set of its cached keys, so invalidation never scans the keyspace.
+"""
+import functools
+import inspect
+import orjson
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+
+from database.redis_client import get_redis
+
+CACHE_PREFIX = "respcache:"
+DEFAULT_TTL = 5
+
+# Longest TTL of any decorated endpoint; index sets live this long after their last write
+_max_ttl = DEFAULT_TTL
+
+
+def _cache_key(request: Request) -> str:
+    return f"{CACHE_PREFIX}{request.url.path}?{request.url.query}"
+
+
+def _index_key(path_prefix: str) -> str:
+    return f"{CACHE_PREFIX}index:{path_prefix}"
+
+
+def top_level_path(path: str) -> str:
+    """First path segment, e.g. /api for /api/analyze"""
+    return "/" + path.lstrip("/").split("/", 1)[0]
+
+
+def cached_prefixes(routes) -> frozenset[str]:
+    """Top-level paths that have at least one @cache_config endpoint among routes"""
+    return frozenset(
+        top_level_path(route.path)
+        for route in routes
+        if getattr(getattr(route, "endpoint", None), "response_cache_ttl", None)
+    )
+
+
+def cache_config(ttl_seconds: int = DEFAULT_TTL):
+    """
+    Cache a GET endpoint's JSON result in Redis for ttl_seconds.
+    Errors (raised HTTPExceptions) and Response objects are never cached; if
+    Redis is unavailable the endpoint simply runs uncached.
+    Usage:
+        @app.get("/items")
+        @cache_config(ttl_seconds=30)
+        async def list_items(): ...
+    """
+    global _max_ttl
+    _max_ttl = max(_max_ttl, ttl_seconds)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        request_param = next(
+            (p.name for p in signature.parameters.values() if p.annotation is Request),
+            None,
+        )
+        # Ask FastAPI for the Request if the endpoint doesn't already take it
+        injected = request_param is None
+        if injected:
+            request_param = "_cache_request"
+            signature = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(request_param, inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.pop(request_param) if injected else kwargs[request_param]
+            redis = get_redis()
+            key = _cache_key(request)
+
+            if redis is not None:
+                try:
+                    cached = await redis.get(key)
+                except RedisError:
+                    cached = None
+                if cached is not None:
+                    return Response(content=cached, media_type="application/json")
+
+            result = await func(*args, **kwargs)
+
+            if redis is not None and not isinstance(result, Response):
+                index = _index_key(top_level_path(request.url.path))
+                try:
+                    async with redis.pipeline(transaction=False) as pipe:
+                        pipe.setex(key, ttl_seconds, orjson.dumps(result))
+                        pipe.sadd(index, key)
+                        pipe.expire(index, _max_ttl)
+                        await pipe.execute()
+                except (RedisError, TypeError) as e:
+                    print(f"[Ascendly] Response cache write failed for {request.url.path}: {e}")
+            return result
+
+        wrapper.__signature__ = signature
+        wrapper.response_cache_ttl = ttl_seconds  # marks the route for cached_prefixes()
+        return wrapper
+
+    return decorator
+
+
+async def invalidate_prefix(path_prefix: str):
+    """Drop every cached GET response under a top-level path (e.g. /api)"""
+    redis = get_redis()
+    if redis is None:
+        return
+    index = _index_key(path_prefix)
+    try:
+        # Read and clear the index atomically; keys cached after this land in a fresh index
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.smembers(index)
+            pipe.delete(index)
+            keys, _ = await pipe.execute()
+        if keys:
+            await redis.delete(*keys)
+    except RedisError as e:
+        print(f"[Ascendly] Response cache invalidation failed for {path_prefix}: {e}")
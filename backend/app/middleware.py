@@ -0,0 +1,94 @@
+"""
+ASGI Middleware
+"""
+from app.cache import cached_prefixes, invalidate_prefix, top_level_path
+
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class CacheInvalidationMiddleware:
+    """
+    After a successful write request, drop cached GETs under the same top-level path (e.g. /api).
+    Writes under paths with no @cache_config endpoint (e.g. /auth) pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._cached_prefixes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in _READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        if self._cached_prefixes is None:
+            # Routes are all registered by the first request; Starlette puts the app in scope
+            self._cached_prefixes = cached_prefixes(scope["app"].routes)
+        top_level = top_level_path(scope["path"])
+        if top_level not in self._cached_prefixes:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+        if status_code is not None and 200 <= status_code < 300:
+            await invalidate_prefix(top_level)
+
+
+class PlainCORSMiddleware:
+    """
+    CORS for a single allowed origin with credentials: appends fixed headers to
+    responses and answers preflight OPTIONS directly. Requests from any other
+    origin pass through untouched (the browser then blocks them).
+    """
+
+    ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+    MAX_AGE = b"600"
+
+    def __init__(self, app, allow_origin: str):
+        self.app = app
+        self.allow_origin = allow_origin.encode()
+        self.cors_headers = [
+            (b"access-control-allow-origin", self.allow_origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if headers.get(b"origin") != self.allow_origin:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+            preflight_headers = [
+                *self.cors_headers,
+                (b"access-control-allow-methods", self.ALLOW_METHODS),
+                (b"access-control-max-age", self.MAX_AGE),
+            ]
+            requested_headers = headers.get(b"access-control-request-headers")
+            if requested_headers:
+                # Equivalent of allow_headers=["*"]: echo what the browser asked for
+                preflight_headers.append((b"access-control-allow-headers", requested_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": preflight_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), *self.cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
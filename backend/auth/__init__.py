@@ -0,0 +1,12 @@
+from .batcher import auth_batcher
+from .cache import cache_user, forget_user, get_current_user, optional_bearer_scheme
+from .profiles import get_profile_by_email
+
+__all__ = [
+    "auth_batcher",
+    "cache_user",
+    "forget_user",
+    "get_current_user",
+    "get_profile_by_email",
+    "optional_bearer_scheme",
+]
@@ -0,0 +1,91 @@
+"""
+Auth Batcher - coalesces concurrent sign-in requests
+GoTrue has no batch endpoint, so each sign-in is still its own request; a burst is
+only collected (up to MAX_BATCH, waiting at most MAX_WAIT) and fanned out together
+over the shared HTTP/2 client. A lone sign-in is dispatched immediately.
+"""
+import asyncio
+from contextlib import suppress
+import httpx
+
+from database.supabase_client import sign_in
+
+MAX_BATCH = 32
+MAX_WAIT = 0.005  # seconds
+
+
+class AuthBatcher:
+    """Queues sign-in calls and resolves each caller's future from its batch."""
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._http: httpx.AsyncClient | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    def start(self, http: httpx.AsyncClient):
+        """Start draining the queue (call from the app lifespan)"""
+        self._http = http
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the worker, let in-flight batches finish, and fail anything still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Auth batcher stopped"))
+
+    async def submit(self, email: str, password: str) -> dict | None:
+        """Queue a sign-in and wait for its session (same result/errors as sign_in)"""
+        if self._worker is None:
+            raise RuntimeError("Auth batcher not started")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((email, password, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                # Only a burst already in progress waits a few ms for the batch to fill
+                if 0 < self._queue.qsize() < self.max_batch - 1:
+                    await asyncio.sleep(self.max_wait)
+            except asyncio.CancelledError:
+                # stop() only fails what is still queued; fail what we already took
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Auth batcher stopped"))
+                raise
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Dispatch without awaiting so the next batch can start collecting
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: list[tuple]):
+        results = await asyncio.gather(
+            *(sign_in(self._http, email, password) for email, password, _ in batch),
+            return_exceptions=True,
+        )
+        for (_, _, future), result in zip(batch, results):
+            if future.done():  # caller disconnected
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+auth_batcher = AuthBatcher()
@@ -0,0 +1,99 @@
+"""
+Auth Cache - Redis-backed cache of verified Supabase users
+Keys are sha256 hashes of the access token, so raw JWTs are never stored.
+"""
+import base64
+import hashlib
+import time
+import orjson
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from redis.exceptions import RedisError
+
+from database.redis_client import get_redis
+from database.supabase_client import get_current_user as fetch_supabase_user
+
+# Upper bound (seconds) on how long a verified user stays cached
+AUTH_CACHE_TTL = 3600
+
+bearer_scheme = HTTPBearer()
+optional_bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _cache_key(token: str) -> str:
+    return f"auth:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def _token_ttl(token: str) -> int:
+    """Seconds until the JWT's `exp`, capped at AUTH_CACHE_TTL. 0 if expired or unreadable."""
+    try:
+        payload = token.split(".")[1]
+        claims = orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return max(0, min(AUTH_CACHE_TTL, int(claims["exp"] - time.time())))
+    except (IndexError, KeyError, TypeError, ValueError):
+        return 0
+
+
+async def cache_user(token: str, user: dict):
+    """Cache a verified user for the remaining lifetime of their token"""
+    redis = get_redis()
+    ttl = _token_ttl(token)
+    if redis is None or ttl == 0:
+        return
+    try:
+        await redis.setex(_cache_key(token), ttl, orjson.dumps(user))
+    except RedisError as e:
+        print(f"[Ascendly] Auth cache write failed: {e}")
+
+
+async def get_cached_user(token: str) -> dict | None:
+    """Look up a cached user by token. None on a miss or if Redis is unavailable."""
+    redis = get_redis()
+    if redis is None:
+        return None
+    try:
+        cached = await redis.get(_cache_key(token))
+    except RedisError as e:
+        print(f"[Ascendly] Auth cache read failed: {e}")
+        return None
+    return orjson.loads(cached) if cached else None
+
+
+async def forget_user(token: str):
+    """Drop a token from the cache (e.g. on sign out)"""
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        await redis.delete(_cache_key(token))
+    except RedisError as e:
+        print(f"[Ascendly] Auth cache delete failed: {e}")
+
+
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> dict:
+    """
+    Dependency for FastAPI - resolves the bearer token to {"id", "email"}
+    Checks Redis first; on a miss verifies the token with Supabase and caches the result.
+    Usage in FastAPI:
+        @app.get("/me")
+        async def me(user: dict = Depends(get_current_user)):
+            return user
+    """
+    token = credentials.credentials
+    user = await get_cached_user(token)
+    if user is not None:
+        return user
+
+    try:
+        supabase_user = await fetch_supabase_user(request.app.state.http, token)
+    except Exception:
+        supabase_user = None
+    if not supabase_user or not supabase_user.get("id"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+
+    user = {"id": str(supabase_user["id"]), "email": supabase_user.get("email")}
+    await cache_user(token, user)
+    return user
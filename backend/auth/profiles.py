@@ -0,0 +1,19 @@
+"""
+Profile Lookups - Core queries against public.profiles for the auth path
+Returns plain rows rather than ORM instances; only id and email are read.
+"""
+from sqlalchemy import Row, bindparam, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import users_t
+
+# lower(email) matches ix_profiles_email_lower, so this is an index seek
+_BY_EMAIL = select(users_t.c.id, users_t.c.email).where(
+    func.lower(users_t.c.email) == func.lower(bindparam("email"))
+)
+
+
+async def get_profile_by_email(db: AsyncSession, email: str) -> Row | None:
+    """Get (id, email) for a profile by email, case-insensitively. None if not found."""
+    result = await db.execute(_BY_EMAIL, {"email": email})
+    return result.first()
@@ -0,0 +1,33 @@
+"""
+App Settings - read once per process from the environment / .env
+"""
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Settings:
+    supabase_url: str | None
+    supabase_key: str | None
+    database_url: str | None
+    redis_url: str | None
+    # Worker processes sharing the database (exported by gunicorn_conf.py)
+    web_concurrency: int
+    # Direct-connection budget for the whole server, split across workers
+    db_max_connections: int
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings from the environment (parsed on first call, then cached)"""
+    load_dotenv()
+    return Settings(
+        supabase_url=os.getenv("SUPABASE_URL"),
+        supabase_key=os.getenv("SUPABASE_KEY"),
+        database_url=os.getenv("DATABASE_URL"),
+        redis_url=os.getenv("REDIS_URL"),
+        web_concurrency=int(os.getenv("WEB_CONCURRENCY", 1)),
+        db_max_connections=int(os.getenv("DB_MAX_CONNECTIONS", 30)),
+    )
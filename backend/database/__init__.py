@@ -1,11 +1,11 @@
-from .supabase_client import get_supabase_client, supabase
-from .sqlalchemy_client import get_db, engine, SessionLocal, Base
+from .supabase_client import get_supabase_client
+from .sqlalchemy_client import get_db, DBSession, engine, AsyncSessionLocal, Base
 
 __all__ = [
     "get_supabase_client",
-    "supabase",
     "get_db",
+    "DBSession",
     "engine",
-    "SessionLocal",
+    "AsyncSessionLocal",
     "Base",
 ]
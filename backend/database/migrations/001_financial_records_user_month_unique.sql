@@ -0,0 +1,13 @@
+-- Unique (user_id, month) on financial_records
+-- Required by the upsert in POST /api/analyze (on_conflict="user_id,month").
+-- Run in Supabase SQL Editor.
+
+-- Collapse duplicates left by earlier plain inserts, keeping one row per (user_id, month)
+DELETE FROM public.financial_records a
+    USING public.financial_records b
+    WHERE a.user_id = b.user_id
+      AND a.month = b.month
+      AND a.ctid < b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS financial_records_user_id_month_key
+    ON public.financial_records (user_id, month);
@@ -0,0 +1,13 @@
+-- Case-insensitive unique email on profiles
+-- Replaces the plain btree from `index=True` (and any UNIQUE constraint) with a single
+-- functional index, so lower(email) lookups are index seeks and writes maintain one index.
+-- Run in Supabase SQL Editor.
+
+DROP INDEX IF EXISTS public.ix_profiles_email;
+ALTER TABLE public.profiles DROP CONSTRAINT IF EXISTS profiles_email_key;
+
+-- Fails if rows without an email exist; backfill them from auth.users first
+ALTER TABLE public.profiles ALTER COLUMN email SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_profiles_email_lower
+    ON public.profiles (lower(email));
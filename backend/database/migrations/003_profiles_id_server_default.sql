@@ -0,0 +1,7 @@
+-- Generate profiles.id in Postgres instead of in Python (uuid.uuid4 per insert)
+-- Run in Supabase SQL Editor.
+
+-- gen_random_uuid() is built in on Postgres 13+; pgcrypto provides it on older servers
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+ALTER TABLE public.profiles ALTER COLUMN id SET DEFAULT gen_random_uuid();
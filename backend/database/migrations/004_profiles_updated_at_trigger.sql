@@ -0,0 +1,13 @@
+-- Maintain profiles.updated_at in Postgres instead of binding now() on every UPDATE
+-- Run in Supabase SQL Editor.
+
+CREATE OR REPLACE FUNCTION public.trigger_set_timestamp() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS set_timestamp ON public.profiles;
+CREATE TRIGGER set_timestamp BEFORE UPDATE ON public.profiles
+    FOR EACH ROW EXECUTE FUNCTION public.trigger_set_timestamp();
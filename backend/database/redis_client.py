@@ -0,0 +1,29 @@
+"""
+Redis Client - Use for Caching (auth lookups, responses)
+"""
+import redis.asyncio as redis
+
+from config import get_settings
+
+REDIS_URL = get_settings().redis_url
+
+# Connections shared by every cache helper in this process
+MAX_CONNECTIONS = 20
+
+redis_client: redis.Redis = None
+
+
+def get_redis() -> redis.Redis | None:
+    """Get or create the shared Redis client. Returns None if REDIS_URL is not set (caching disabled)."""
+    global redis_client
+    if redis_client is None and REDIS_URL:
+        redis_client = redis.Redis.from_url(REDIS_URL, max_connections=MAX_CONNECTIONS)
+    return redis_client
+
+
+async def close_redis():
+    """Close the shared Redis connection pool"""
+    global redis_client
+    if redis_client is not None:
+        await redis_client.aclose()
+        redis_client = None
@@ -1,49 +1,91 @@
 """
 SQLAlchemy Client - Use for Complex Queries & Analytics
+Async engine (asyncpg) so DB-bound endpoints don't block the event loop.
 """
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import Annotated
+from uuid import uuid4
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool
 
-load_dotenv()
+from config import get_settings
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_URL = get_settings().database_url
 
 engine = None
-SessionLocal = None
+AsyncSessionLocal = None
 
 if DATABASE_URL:
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
-    )
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # asyncpg driver; accepts the plain postgresql:// URI from the Supabase dashboard
+    ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # Transaction-mode poolers hand server connections between clients, so asyncpg's
+    # per-connection prepared statements can't survive — disable them.
+    NO_PREPARED_STATEMENTS = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+    if ":6543" in DATABASE_URL:
+        # Supabase's Supavisor pooler: let it do all the pooling
+        engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            poolclass=NullPool,
+            connect_args=NO_PREPARED_STATEMENTS,
+        )
+    elif ":6432" in DATABASE_URL:
+        # Our PgBouncer (docker-compose.yml) multiplexes server connections,
+        # so a small local pool of cheap client connections is enough
+        engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=5,
+            pool_timeout=30,
+            connect_args=NO_PREPARED_STATEMENTS,
+        )
+    else:
+        # Direct connection (:5432): every worker process has its own pool, so split
+        # DB_MAX_CONNECTIONS across WEB_CONCURRENCY — roughly 2/3 kept open, 1/3 overflow
+        settings = get_settings()
+        per_worker = max(2, settings.db_max_connections // max(1, settings.web_concurrency))
+        engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_pre_ping=True,  # detect sockets Supabase dropped while idle
+            pool_size=per_worker - per_worker // 3,
+            max_overflow=per_worker // 3,
+            pool_timeout=30,
+            pool_recycle=1800,  # reconnect before idle-connection limits kick in
+        )
+    AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
-    Dependency for FastAPI - yields database session
+    Dependency for FastAPI - yields an async database session
     Usage in FastAPI:
         @app.get("/users")
-        def get_users(db: Session = Depends(get_db)):
-            return db.query(User).all()
+        async def get_users(db: DBSession):
+            result = await db.execute(select(User))
+            return result.scalars().all()
     """
-    if SessionLocal is None:
+    if AsyncSessionLocal is None:
         raise RuntimeError("DATABASE_URL not configured in .env")
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def init_db():
+# Request-scoped session parameter type: `db: DBSession`
+DBSession = Annotated[AsyncSession, Depends(get_db)]
+
+
+async def init_db():
     """Create all tables in database"""
     from models import Base  # Import models to register them
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
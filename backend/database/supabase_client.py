@@ -1,64 +1,155 @@
 """
 Supabase Client - Use for Authentication & Simple CRUD operations
 """
-import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import asyncio
+from functools import lru_cache
+import httpx
+from supabase import create_client, acreate_client, Client, AsyncClient, ClientOptions, AsyncClientOptions
 
-load_dotenv()
+from config import get_settings
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+SUPABASE_URL = get_settings().supabase_url
+SUPABASE_KEY = get_settings().supabase_key
 
-supabase: Client = None
+# Request timeouts (seconds) for the PostgREST and Storage sub-clients
+CLIENT_TIMEOUT = 10
 
+# Each client builds its PostgREST sub-client once and keeps its pooled
+# HTTP session, so reusing the singleton reuses keep-alive connections.
+async_supabase: AsyncClient = None
+_async_supabase_lock = asyncio.Lock()  # so concurrent first calls build one client
 
+
+@lru_cache(maxsize=1)
 def get_supabase_client() -> Client:
-    """Get or create Supabase client instance"""
-    global supabase
-    if supabase is None:
-        if not SUPABASE_URL or not SUPABASE_KEY:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-    return supabase
+    """Get the Supabase client instance (created on first call, then cached)"""
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+    return create_client(
+        SUPABASE_URL,
+        SUPABASE_KEY,
+        options=ClientOptions(
+            postgrest_client_timeout=CLIENT_TIMEOUT,
+            storage_client_timeout=CLIENT_TIMEOUT,
+        ),
+    )
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """Get or create the async Supabase client instance (for use inside FastAPI handlers)"""
+    global async_supabase
+    if async_supabase is None:
+        async with _async_supabase_lock:
+            if async_supabase is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+                async_supabase = await acreate_client(
+                    SUPABASE_URL,
+                    SUPABASE_KEY,
+                    options=AsyncClientOptions(
+                        postgrest_client_timeout=CLIENT_TIMEOUT,
+                        storage_client_timeout=CLIENT_TIMEOUT,
+                    ),
+                )
+    return async_supabase
 
 
 # ============ AUTH HELPERS ============
-
-async def sign_up(email: str, password: str):
-    """Register a new user"""
-    client = get_supabase_client()
-    response = client.auth.sign_up({"email": email, "password": password})
-    return response
+# Auth calls hit Supabase's Auth (GoTrue) REST API over one shared, pooled
+# httpx.AsyncClient (created in main.py's lifespan), so TLS handshakes are
+# paid once per connection rather than once per call.
+
+# Statuses GoTrue uses to reject bad credentials / signups (wrong password, taken email,
+# weak password). sign_in and sign_up report these as None instead of raising.
+AUTH_REJECTED_STATUSES = frozenset({400, 401, 422})
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP/2 client for Supabase REST calls (one per process)"""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=CLIENT_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+    )
+
+
+async def _auth_request(
+    http: httpx.AsyncClient, method: str, path: str, token: str = None,
+    rejected: frozenset[int] = frozenset(), **kwargs,
+) -> dict | None:
+    """
+    Call a Supabase Auth endpoint. Returns None for a status in `rejected`;
+    raises ValueError with Supabase's error message on any other failure.
+    """
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
+    headers = {"apikey": SUPABASE_KEY, "Authorization": f"Bearer {token or SUPABASE_KEY}"}
+    response = await http.request(method, f"{SUPABASE_URL}/auth/v1{path}", headers=headers, **kwargs)
+    if response.status_code in rejected:
+        return None
+    try:
+        body = response.json() if response.content else {}
+    except ValueError:
+        body = {}
+    if response.is_error:
+        message = None
+        if isinstance(body, dict):
+            message = body.get("msg") or body.get("error_description") or body.get("message")
+        raise ValueError(message or f"Supabase auth error ({response.status_code})")
+    return body
+
+
+async def sign_up(http: httpx.AsyncClient, email: str, password: str) -> dict | None:
+    """Register a new user. Returns the created user, or None if Supabase rejected the signup."""
+    data = await _auth_request(
+        http, "POST", "/signup",
+        rejected=AUTH_REJECTED_STATUSES,
+        json={"email": email, "password": password},
+    )
+    if data is None:
+        return None
+    # With email confirmation off, Supabase returns a full session wrapping the user
+    return data.get("user", data)
+
+
+async def sign_in(http: httpx.AsyncClient, email: str, password: str) -> dict | None:
+    """Sign in existing user. Returns the session (access_token, user, ...), or None for bad credentials."""
+    return await _auth_request(
+        http, "POST", "/token",
+        rejected=AUTH_REJECTED_STATUSES,
+        params={"grant_type": "password"},
+        json={"email": email, "password": password},
+    )
+
+
+async def sign_out(http: httpx.AsyncClient, access_token: str):
+    """Sign out the user owning this access token"""
+    return await _auth_request(http, "POST", "/logout", token=access_token)
+
+
+async def get_current_user(http: httpx.AsyncClient, access_token: str) -> dict:
+    """Get the user for an access token"""
+    return await _auth_request(http, "GET", "/user", token=access_token)
 
 
-async def sign_in(email: str, password: str):
-    """Sign in existing user"""
-    client = get_supabase_client()
-    response = client.auth.sign_in_with_password({"email": email, "password": password})
-    return response
-
+# ============ CRUD HELPERS ============
 
-async def sign_out():
-    """Sign out current user"""
+def insert_record(table: str, data: dict | list[dict]):
+    """Insert a record (or a list of records, as one bulk insert) into a table"""
     client = get_supabase_client()
-    response = client.auth.sign_out()
-    return response
-
+    return client.table(table).insert(data).execute()
 
-async def get_current_user():
-    """Get currently authenticated user"""
-    client = get_supabase_client()
-    response = client.auth.get_user()
-    return response
 
+async def insert_record_async(table: str, data: dict | list[dict]):
+    """Insert a record (or a list of records) without blocking the event loop"""
+    client = await get_async_supabase_client()
+    return await client.table(table).insert(data).execute()
 
-# ============ CRUD HELPERS ============
 
-def insert_record(table: str, data: dict):
-    """Insert a record into a table"""
-    client = get_supabase_client()
-    return client.table(table).insert(data).execute()
+async def upsert_records_async(table: str, data: list[dict], on_conflict: str):
+    """Insert records, updating rows that collide on the `on_conflict` columns (needs a unique index)"""
+    client = await get_async_supabase_client()
+    return await client.table(table).upsert(data, on_conflict=on_conflict).execute()
 
 
 def get_records(table: str, filters: dict = None):
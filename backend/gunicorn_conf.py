@@ -0,0 +1,20 @@
+"""
+Gunicorn Config - Production server
+Run from backend/:  gunicorn -c gunicorn_conf.py main:app
+HTTP/1.1 only - terminate TLS and HTTP/2 at a reverse proxy in front (see README)
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# Uvicorn workers pick up uvloop + httptools from uvicorn[standard]
+worker_class = "uvicorn.workers.UvicornWorker"
+# Async workers each multiplex many requests, so one per core is enough
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Workers inherit this and split DB_MAX_CONNECTIONS between them (database/sqlalchemy_client.py)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# No per-request access log lines; errors still go to stderr
+accesslog = None
+errorlog = "-"
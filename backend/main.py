@@ -1,31 +1,60 @@
 """
 Ascendly MVP - FastAPI Backend
 """
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Annotated
+import orjson
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, StringConstraints
 from sqlalchemy import text
-from sqlalchemy.orm import Session
 
-from database import get_db, get_supabase_client
-from database.supabase_client import sign_up, sign_in, sign_out
+from database import DBSession, get_supabase_client
+from database.redis_client import get_redis, close_redis
+from database.supabase_client import create_http_client, sign_up, sign_out
+from auth import auth_batcher, cache_user, forget_user, optional_bearer_scheme
 from app.api.endpoints.analysis import router as analysis_router
+from app.cache import cache_config
+from app.middleware import CacheInvalidationMiddleware, PlainCORSMiddleware
+from ai_engine.tools.sarimax_tool import warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the forecaster and open shared pools before serving; close them on shutdown"""
+    warmup()  # load statsmodels and JIT-compile forecast helpers
+    app.state.http = create_http_client()
+    auth_batcher.start(app.state.http)
+    get_redis()
+    yield
+    await auth_batcher.stop()
+    await app.state.http.aclose()
+    await close_redis()
+
 
 app = FastAPI(
     title="Ascendly API",
     description="AI-powered SaaS platform",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS - Allow frontend to connect
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # Next.js dev server
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    PlainCORSMiddleware,
+    allow_origin="http://localhost:3000",  # Next.js dev server
 )
 
+# Drop cached GET responses when a related write succeeds
+app.add_middleware(CacheInvalidationMiddleware)
+
+# Compress JSON bodies (signin tokens, analysis results); tiny ones aren't worth it
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
 
 # ============ ROUTERS ============
 app.include_router(analysis_router)
@@ -33,8 +62,12 @@ app.include_router(analysis_router)
 
 # ============ SCHEMAS ============
 
+# Shape check only — Supabase validates deliverability on signup
+Email = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=254)]
+
+
 class UserAuth(BaseModel):
-    email: EmailStr
+    email: Email
     password: str
 
 
@@ -44,18 +77,42 @@ class UserResponse(BaseModel):
     message: str
 
 
+# ============ STATIC RESPONSES ============
+# Constant bodies are encoded once at import; each request only wraps the bytes.
+
+_JSON = "application/json"
+
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "service": "Ascendly API"})
+_HEALTH_HEADERS = {
+    "Cache-Control": "public, max-age=5",
+    "ETag": f'"{hashlib.sha256(_HEALTH_BODY).hexdigest()[:16]}"',
+}
+
+_SIGNOUT_BODY = orjson.dumps({"message": "Signed out successfully"})
+
+# Known failure bodies, same shape as HTTPException's {"detail": ...}
+_INVALID_CREDENTIALS_BODY = orjson.dumps({"detail": "Invalid credentials"})
+_REGISTRATION_FAILED_BODY = orjson.dumps({"detail": "Registration failed"})
+
+# Built once; SQLAlchemy's compiled cache keys off this statement
+_PING = text("SELECT 1")
+
+
 # ============ HEALTH CHECK ============
 
 @app.get("/")
-def health_check():
-    return {"status": "healthy", "service": "Ascendly API"}
+async def health_check(request: Request):
+    if request.headers.get("if-none-match") == _HEALTH_HEADERS["ETag"]:
+        return Response(status_code=304, headers=_HEALTH_HEADERS)
+    return Response(content=_HEALTH_BODY, media_type=_JSON, headers=_HEALTH_HEADERS)
 
 
 @app.get("/health/db")
-def db_health_check(db: Session = Depends(get_db)):
+@cache_config(ttl_seconds=5)
+async def db_health_check(db: DBSession):
     """Check database connection"""
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(_PING)
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -63,53 +120,54 @@ def db_health_check(db: Session = Depends(get_db)):
 
 # ============ AUTH ENDPOINTS ============
 
-@app.post("/auth/signup", response_model=UserResponse)
+# response_model=None: the body is built from trusted Supabase fields, so skip FastAPI's
+# validate-and-serialize pass; `responses` keeps the schema in the OpenAPI docs
+@app.post("/auth/signup", response_model=None, responses={200: {"model": UserResponse}})
 async def register(user: UserAuth):
     """Register a new user"""
     try:
-        response = await sign_up(user.email, user.password)
-        if response.user:
-            return UserResponse(
-                id=str(response.user.id),
-                email=response.user.email,
-                message="User created successfully. Check email for verification.",
-            )
-        raise HTTPException(status_code=400, detail="Registration failed")
+        new_user = await sign_up(app.state.http, user.email, user.password)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if not new_user or not new_user.get("id"):
+        return Response(content=_REGISTRATION_FAILED_BODY, status_code=400, media_type=_JSON)
+    return ORJSONResponse({
+        "id": str(new_user["id"]),
+        "email": new_user["email"],
+        "message": "User created successfully. Check email for verification.",
+    })
 
 
 @app.post("/auth/signin")
 async def login(user: UserAuth):
     """Sign in existing user"""
     try:
-        response = await sign_in(user.email, user.password)
-        if response.user:
-            return {
-                "user": {
-                    "id": str(response.user.id),
-                    "email": response.user.email,
-                },
-                "access_token": response.session.access_token,
-                "token_type": "bearer",
-            }
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+        session = await auth_batcher.submit(user.email, user.password)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
+    if not session or not session.get("user"):
+        return Response(content=_INVALID_CREDENTIALS_BODY, status_code=401, media_type=_JSON)
+    user_data = {
+        "id": str(session["user"]["id"]),
+        "email": session["user"]["email"],
+    }
+    # Later requests resolve this token from Redis instead of calling Supabase
+    await cache_user(session["access_token"], user_data)
+    return {
+        "user": user_data,
+        "access_token": session["access_token"],
+        "token_type": "bearer",
+    }
 
 
 @app.post("/auth/signout")
-async def logout():
+async def logout(credentials: HTTPAuthorizationCredentials | None = Depends(optional_bearer_scheme)):
     """Sign out current user"""
     try:
-        await sign_out()
-        return {"message": "Signed out successfully"}
+        if credentials:
+            await forget_user(credentials.credentials)
+            await sign_out(app.state.http, credentials.credentials)
+        return Response(content=_SIGNOUT_BODY, media_type=_JSON)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-
-# ============ RUN SERVER ============
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,4 +1,4 @@
 from database.sqlalchemy_client import Base
-from .user import User
+from .user import User, users_t
 
-__all__ = ["Base", "User"]
+__all__ = ["Base", "User", "users_t"]
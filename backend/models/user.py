@@ -1,11 +1,10 @@
 """
 User Model - Synced with Supabase auth.users
 """
-from sqlalchemy import Column, String, DateTime, Boolean, Text
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Index, FetchedValue, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from database.sqlalchemy_client import Base
-import uuid
 
 
 class User(Base):
@@ -14,14 +13,27 @@ class User(Base):
     Create this table in Supabase SQL Editor:
 
     CREATE TABLE public.profiles (
-        id UUID REFERENCES auth.users(id) PRIMARY KEY,
-        email TEXT,
+        id UUID REFERENCES auth.users(id) PRIMARY KEY DEFAULT gen_random_uuid(),
+        email TEXT NOT NULL,
         full_name TEXT,
         avatar_url TEXT,
         created_at TIMESTAMPTZ DEFAULT NOW(),
         updated_at TIMESTAMPTZ DEFAULT NOW()
     );
 
+    -- One case-insensitive unique index serves both uniqueness and lookups
+    CREATE UNIQUE INDEX ix_profiles_email_lower ON public.profiles (lower(email));
+
+    -- Keep updated_at current on every UPDATE
+    CREATE FUNCTION public.trigger_set_timestamp() RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := now();
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    CREATE TRIGGER set_timestamp BEFORE UPDATE ON public.profiles
+        FOR EACH ROW EXECUTE FUNCTION public.trigger_set_timestamp();
+
     -- Enable RLS
     ALTER TABLE public.profiles ENABLE ROW LEVEL SECURITY;
 
@@ -33,13 +45,24 @@ class User(Base):
     """
     __tablename__ = "profiles"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    email = Column(String(255), unique=True, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    email = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=True)
     avatar_url = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Set by the set_timestamp trigger on UPDATE
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())
+
+    __table_args__ = (
+        # Enforces uniqueness and serves lower(email) = lower(:email) lookups
+        Index("ix_profiles_email_lower", func.lower(email), unique=True),
+    )
 
     def __repr__(self):
         return f"<User {self.email}>"
+
+
+# Core view of the same table for hot columnar reads (no identity map / unit of work).
+# Use `User` for admin and CRUD paths that need ORM instances.
+users_t = User.__table__